@@ -88,6 +88,7 @@ def add_credentials(usb_path, url, username, password):
     exists = cursor.fetchone()[0]
     
     if exists:
+        conn.close()
         print(f"Credentials already exist for {username} @ {url}.")
         return
     else:
@@ -139,8 +140,8 @@ def show_credentials(usb_path):
     else:
         print("No credentials stored.")
 
-def encrypt_file(file_path, key):
-    """Encrypt the database file using AES‑256‑CBC with PKCS7 padding.
+def encrypt_bytes(plaintext, key):
+    """Encrypt a bytes blob using AES‑256‑CBC with PKCS7 padding.
 
     A fresh 16‑byte IV is generated and prepended to the ciphertext.
     """
@@ -152,30 +153,38 @@ def encrypt_file(file_path, key):
     encryptor = cipher.encryptor()
     padder = padding.PKCS7(128).padder()
 
-    with open(file_path, 'rb') as f:
-        plaintext = f.read()
-
     padded = padder.update(plaintext) + padder.finalize()
-    ciphertext = encryptor.update(padded) + encryptor.finalize()
-
-    with open(file_path, 'wb') as f:
-        f.write(iv + ciphertext)
+    return iv + encryptor.update(padded) + encryptor.finalize()
 
-def decrypt_file(file_path, key):
-    """Decrypt the AES‑256‑CBC encrypted database file."""
+def decrypt_bytes(data, key):
+    """Decrypt an IV‑prefixed AES‑256‑CBC blob produced by `encrypt_bytes`."""
     if len(key) != 32:
         raise ValueError("Key must be 32 bytes (256 bits).")
 
-    with open(file_path, 'rb') as f:
-        data = f.read()
-
     iv, ciphertext = data[:16], data[16:]
     cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
     decryptor = cipher.decryptor()
     padded_plain = decryptor.update(ciphertext) + decryptor.finalize()
 
     unpadder = padding.PKCS7(128).unpadder()
-    plaintext = unpadder.update(padded_plain) + unpadder.finalize()
+    return unpadder.update(padded_plain) + unpadder.finalize()
+
+def encrypt_file(file_path, key):
+    """Encrypt the database file in place (see `encrypt_bytes`)."""
+    with open(file_path, 'rb') as f:
+        plaintext = f.read()
+
+    ciphertext = encrypt_bytes(plaintext, key)
+
+    with open(file_path, 'wb') as f:
+        f.write(ciphertext)
+
+def decrypt_file(file_path, key):
+    """Decrypt the AES‑256‑CBC encrypted database file in place."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    plaintext = decrypt_bytes(data, key)
 
     with open(file_path, 'wb') as f:
         f.write(plaintext)
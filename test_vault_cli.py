@@ -0,0 +1,179 @@
+"""Tests for vault_cli.py against a throwaway encrypted passwords.db."""
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("cryptography")
+pytest.importorskip("psutil")
+
+from Basic_USB_interface import create_database, encrypt_file, derive_aes_key
+import vault_cli
+
+PASSPHRASE = "correct horse"
+
+
+def _key(passphrase):
+    return bytes.fromhex(derive_aes_key(passphrase))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, capsys):
+    create_database(str(tmp_path))
+    db_path = tmp_path / "passwords.db"
+    encrypt_file(str(db_path), _key(PASSPHRASE))
+    monkeypatch.setenv(vault_cli.PASSPHRASE_ENV, PASSPHRASE)
+    monkeypatch.delenv(vault_cli.NEW_PASSPHRASE_ENV, raising=False)
+    capsys.readouterr()
+    return db_path
+
+
+def cli(monkeypatch, db_path, *argv, stdin=""):
+    monkeypatch.setattr("sys.stdin", io.StringIO(stdin))
+    return vault_cli.main(["-q", "--db", str(db_path), *argv])
+
+
+def test_add_exists_and_force(db, monkeypatch, capsys):
+    assert cli(monkeypatch, db, "add", "a.com", "bob", stdin="one\n") == 0
+    assert cli(monkeypatch, db, "add", "a.com", "bob", stdin="two\n") == 1
+    assert "already exist" in capsys.readouterr().err
+
+    assert cli(monkeypatch, db, "add", "--force", "a.com", "bob", stdin="two\n") == 0
+    capsys.readouterr()
+    assert cli(monkeypatch, db, "get", "a.com") == 0
+    assert capsys.readouterr().out == "bob\ttwo\n"
+
+
+def test_timings_reported(db, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO("pw\n"))
+    assert vault_cli.main(["--db", str(db), "add", "a.com", "bob"]) == 0
+    timings = capsys.readouterr().err.splitlines()[-1]
+    assert timings.startswith("timings: unlock ")
+    assert ", add " in timings and ", seal " in timings and ", total " in timings
+
+    assert vault_cli.main(["--db", str(db), "verify"]) == 0
+    timings = capsys.readouterr().err
+    assert ", verify " in timings and "seal" not in timings
+
+
+def test_add_requires_password(db, monkeypatch, capsys):
+    assert cli(monkeypatch, db, "add", "a.com", "bob") == 1
+    assert "No password read from stdin." in capsys.readouterr().err
+
+
+def test_csv_import_export_round_trip(db, tmp_path, monkeypatch, capsys):
+    batch = tmp_path / "in.csv"
+    batch.write_text(
+        "url,username,password\n"
+        "a.com,bob,1\n"
+        "a.com,bob,2\n"
+        "b.com,al,3\n"
+    )
+    assert cli(monkeypatch, db, "import", str(batch)) == 0
+    assert "2 added, 0 updated, 1 skipped" in capsys.readouterr().err
+
+    out = tmp_path / "out.csv"
+    assert cli(monkeypatch, db, "export", str(out)) == 0
+    assert out.read_text() == "url,username,password\na.com,bob,1\nb.com,al,3\n"
+    if os.name == "posix":
+        assert out.stat().st_mode & 0o777 == 0o600
+
+
+def test_csv_import_with_bom(db, tmp_path, monkeypatch, capsys):
+    csv_text = "url,username,password\na.com,bob,1\n"
+    batch = tmp_path / "excel.csv"
+    batch.write_text(csv_text, encoding="utf-8-sig")
+    assert cli(monkeypatch, db, "import", str(batch)) == 0
+    assert "1 added" in capsys.readouterr().err
+
+    csv_text = "url,username,password\nb.com,al,2\n"
+    assert cli(monkeypatch, db, "import", "--format", "csv", stdin="\ufeff" + csv_text) == 0
+    assert "1 added" in capsys.readouterr().err
+
+
+def test_json_import_force_updates_duplicates(db, monkeypatch, capsys):
+    items = [{"site": "a.com", "username": "bob", "password": "1"}]
+    assert cli(monkeypatch, db, "import", "-", stdin=json.dumps({"items": items})) == 0
+
+    items = [
+        {"url": "a.com", "username": "bob", "password": "2"},
+        {"url": "c.com", "username": "cy", "password": "3"},
+        {"url": "c.com", "username": "cy", "password": "4"},
+    ]
+    assert cli(monkeypatch, db, "import", "--force", stdin=json.dumps(items)) == 0
+    assert "1 added, 1 updated, 0 skipped" in capsys.readouterr().err
+
+    assert cli(monkeypatch, db, "export", "--format", "json") == 0
+    exported = json.loads(capsys.readouterr().out)
+    assert [(e["url"], e["password"]) for e in exported] == [("a.com", "2"), ("c.com", "4")]
+
+
+@pytest.mark.parametrize("batch", [
+    '[{"url": 1, "username": "x", "password": "y"}]',
+    '[{"url": "z", "username": "x", "password": 5}]',
+    '[{"url": "z", "username": "x"}]',
+    '[1]',
+    '{not json',
+    '{"itms": [{"url": "z", "username": "x", "password": "y"}]}',
+    '{"items": {"url": "z"}}',
+])
+def test_import_rejects_bad_json(db, monkeypatch, capsys, batch):
+    assert cli(monkeypatch, db, "import", stdin=batch) == 1
+    assert capsys.readouterr().err.startswith("error: ")
+
+
+def test_import_single_json_object(db, monkeypatch, capsys):
+    entry = {"url": "a.com", "username": "bob", "password": "1"}
+    assert cli(monkeypatch, db, "import", stdin=json.dumps(entry)) == 0
+    assert "1 added, 0 updated, 0 skipped" in capsys.readouterr().err
+
+
+def test_import_rejects_non_utf8(db, tmp_path, monkeypatch, capsys):
+    batch = tmp_path / "bad.json"
+    batch.write_bytes(b"\xff\xfe[")
+    assert cli(monkeypatch, db, "import", str(batch)) == 1
+    assert "not valid UTF-8" in capsys.readouterr().err
+
+
+def test_rekey_then_verify(db, monkeypatch, capsys):
+    cli(monkeypatch, db, "add", "a.com", "bob", stdin="pw\n")
+    monkeypatch.setenv(vault_cli.NEW_PASSPHRASE_ENV, "new passphrase")
+    assert cli(monkeypatch, db, "rekey") == 0
+    capsys.readouterr()
+
+    assert cli(monkeypatch, db, "verify") == 1
+    assert "Incorrect passphrase" in capsys.readouterr().err
+
+    monkeypatch.setenv(vault_cli.PASSPHRASE_ENV, "new passphrase")
+    assert cli(monkeypatch, db, "verify") == 0
+    assert capsys.readouterr().out == "ok: 1 credentials\n"
+
+
+def test_rekey_from_hex_key(db, monkeypatch, capsys):
+    monkeypatch.setenv(vault_cli.PASSPHRASE_ENV, _key(PASSPHRASE).hex())
+    monkeypatch.setenv(vault_cli.NEW_PASSPHRASE_ENV, "new passphrase")
+    assert cli(monkeypatch, db, "--hex-key", "rekey") == 0
+
+    monkeypatch.setenv(vault_cli.PASSPHRASE_ENV, "new passphrase")
+    assert cli(monkeypatch, db, "verify") == 0
+
+
+def test_wrong_passphrase(db, monkeypatch, capsys):
+    before = db.read_bytes()
+    monkeypatch.setenv(vault_cli.PASSPHRASE_ENV, "wrong")
+    assert cli(monkeypatch, db, "add", "a.com", "bob", stdin="pw\n") == 1
+    assert "Incorrect passphrase" in capsys.readouterr().err
+    assert db.read_bytes() == before
+
+
+def test_plaintext_db_rejected(tmp_path, monkeypatch, capsys):
+    create_database(str(tmp_path))
+    monkeypatch.setenv(vault_cli.PASSPHRASE_ENV, PASSPHRASE)
+    db_path = tmp_path / "passwords.db"
+    assert cli(monkeypatch, db_path, "list") == 1
+    assert "not encrypted" in capsys.readouterr().err
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM credentials").fetchone() == (0,)
+    conn.close()
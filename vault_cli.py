@@ -0,0 +1,530 @@
+"""
+Scriptable command-line interface to the encrypted USB database
+---------------------------------------------------------------
+
+Relies on Basic_USB_interface.py (same folder).
+
+Unlike the interactive menu in Basic_USB_interface.py, every invocation:
+
+    1. Derives the AES key ONCE (PBKDF2 is the expensive step)
+    2. Decrypts passwords.db straight into an in-memory SQLite database
+       – the plaintext never touches the USB stick
+    3. Applies the whole command / batch inside ONE transaction
+    4. Re-encrypts ONCE and atomically replaces passwords.db
+       (read-only commands skip this step)
+
+Commands
+--------
+    add URL USERNAME        password read from stdin (or prompted on a tty)
+    get URL [-u USERNAME]   print "username<TAB>password", exit 1 if none
+    list [--show-passwords]
+    import [FILE]           JSON or CSV batch, "-" / omitted = stdin
+    export [FILE]           UNENCRYPTED JSON, CSV or text dump, omitted = stdout
+    rekey                   re-encrypt under a new passphrase
+    verify                  decrypt + SQLite integrity check
+
+Secrets
+-------
+The master passphrase (the same one the Chrome extension uses) is taken from,
+in order: --passphrase-file (use "-" for the first line of stdin), the
+POCKETVAULT_PASSPHRASE environment variable, or a getpass prompt.
+Pass --hex-key to supply a raw 64-hex-character AES key instead; for rekey
+the new secret is a passphrase unless --new-hex-key is given, so a raw-key
+vault from menu option 1 can be moved to the extension's passphrase.
+
+Timings for each phase are written to stderr (silence them with -q).
+
+Run:
+----
+    python vault_cli.py import creds.csv --passphrase-file secret.txt
+    printf '%s\\n' "$PASS" "$SITEPW" | python vault_cli.py add example.com bob --passphrase-file -
+"""
+import argparse
+import csv
+import getpass
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+from Basic_USB_interface import (
+    find_usb_drive,
+    encrypt_bytes,
+    decrypt_bytes,
+    derive_aes_key
+)
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+PASSPHRASE_ENV = "POCKETVAULT_PASSPHRASE"
+NEW_PASSPHRASE_ENV = "POCKETVAULT_NEW_PASSPHRASE"
+
+
+class VaultError(Exception):
+    """Raised for any user-facing failure; reported on stderr with exit code 1."""
+
+
+# ---------- timings --------------------------------------------------
+class Timings:
+    """Collect wall-clock durations of the named phases of one invocation."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        total = sum(seconds for _, seconds in self.phases)
+        parts = [f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.phases]
+        parts.append(f"total {total * 1000:.1f}ms")
+        print("timings: " + ", ".join(parts), file=stream)
+
+
+# ---------- key handling ---------------------------------------------
+def _read_secret(path, env_var, prompt):
+    """Return a secret from a file ("-" = first line of stdin), env var, or prompt."""
+    if path == "-":
+        secret = sys.stdin.readline().rstrip("\r\n")
+    elif path:
+        with open(path, encoding="utf-8") as f:
+            secret = f.readline().rstrip("\r\n")
+    elif os.environ.get(env_var):
+        secret = os.environ[env_var]
+    else:
+        secret = getpass.getpass(prompt)
+
+    if not secret:
+        raise VaultError("Empty passphrase.")
+    return secret
+
+
+def _secret_to_key(secret, hex_key):
+    """Turn a passphrase (or, with --hex-key, a raw hex key) into 32 key bytes."""
+    key_hex = secret.strip() if hex_key else derive_aes_key(secret)
+    try:
+        key = bytes.fromhex(key_hex)
+        if len(key) != 32:
+            raise ValueError
+    except ValueError:
+        raise VaultError("Invalid key format. It must be exactly 64 hexadecimal characters.")
+    return key
+
+
+# ---------- in-memory vault ------------------------------------------
+class Vault:
+    """The decrypted database, held entirely in memory.
+
+    `conn` is an in-memory SQLite connection populated from the decrypted
+    bytes of passwords.db.  Nothing is written back until `seal()`.
+    """
+
+    def __init__(self, db_path, key, plaintext):
+        self.db_path = db_path
+        self.key = key
+        if not hasattr(sqlite3.Connection, "deserialize"):
+            raise VaultError("In-memory databases need Python 3.11 or newer.")
+        self.conn = sqlite3.connect(":memory:")
+        try:
+            self.conn.deserialize(plaintext)
+        except BaseException:
+            self.conn.close()
+            raise
+
+    @classmethod
+    def unlock(cls, db_path, key):
+        """Decrypt `db_path` with `key` without writing any plaintext to disk."""
+        if not os.path.exists(db_path):
+            raise VaultError("passwords.db does not exist on the USB drive. Please run Setup first.")
+
+        with open(db_path, "rb") as f:
+            data = f.read()
+
+        if data.startswith(SQLITE_HEADER):
+            raise VaultError("passwords.db is not encrypted. Re-encrypt it (menu option 2 or /encryptUSB) first.")
+
+        try:
+            plaintext = decrypt_bytes(data, key)
+        except ValueError:
+            raise VaultError("Incorrect passphrase. Failed to decrypt database.")
+        if not plaintext.startswith(SQLITE_HEADER):
+            raise VaultError("Incorrect passphrase. Failed to decrypt database.")
+
+        return cls(db_path, key, plaintext)
+
+    def seal(self, key=None):
+        """Encrypt the in-memory database and atomically replace passwords.db."""
+        if key is not None:
+            self.key = key
+        ciphertext = encrypt_bytes(self.conn.serialize(), self.key)
+
+        tmp_path = self.db_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(ciphertext)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.db_path)
+        except BaseException:
+            # Never leave a stray copy on the stick; the original is untouched.
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def close(self):
+        self.conn.close()
+
+
+# ---------- batch parsing --------------------------------------------
+def _normalise_item(item, lineno):
+    """Accept the server's `site` field name as well as the DB's `url`."""
+    if not isinstance(item, dict):
+        raise VaultError(f"Entry {lineno}: expected an object with url, username, password.")
+    url = item.get("url") or item.get("site")
+    username = item.get("username")
+    password = item.get("password")
+    if url is None or username is None or password is None:
+        raise VaultError(f"Entry {lineno}: url/site, username and password are required.")
+    if not all(isinstance(value, str) for value in (url, username, password)):
+        raise VaultError(f"Entry {lineno}: url/site, username and password must be strings.")
+
+    url, username = url.strip(), username.strip()
+    if not url or not username or not password:
+        raise VaultError(f"Entry {lineno}: url/site, username and password must not be empty.")
+    return url, username, password
+
+
+def _parse_batch(text, fmt):
+    """Parse a JSON (list, {"items": [...]} or one entry) or CSV (with header) batch."""
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise VaultError(f"Invalid JSON: {e}")
+        if isinstance(data, dict):
+            if "items" in data:
+                data = data["items"]
+            elif "password" in data:
+                data = [data]
+            else:
+                raise VaultError("JSON object batch needs an \"items\" list (or a single url/username/password entry).")
+        if not isinstance(data, list):
+            raise VaultError("JSON batch must be a list of objects or {\"items\": [...]}.")
+        return [_normalise_item(item, i) for i, item in enumerate(data, 1)]
+
+    reader = csv.DictReader(io.StringIO(text))
+    try:
+        return [_normalise_item(row, i) for i, row in enumerate(reader, 1)]
+    except csv.Error as e:
+        raise VaultError(f"Invalid CSV: {e}")
+
+
+def _guess_format(path, fmt):
+    if fmt:
+        return fmt
+    if path and path.lower().endswith(".csv"):
+        return "csv"
+    if path and path.lower().endswith(".txt"):
+        return "text"
+    return "json"
+
+
+# ---------- commands -------------------------------------------------
+def _apply_batch(conn, items, force):
+    """Insert/overwrite `items` in one pass; returns (added, updated, skipped)."""
+    # No UNIQUE constraint on (url, username): like overwrite_credentials,
+    # an overwrite updates every matching row, so keep all ids per pair.
+    existing = {}
+    for row_id, url, username in conn.execute("SELECT id, url, username FROM credentials"):
+        existing.setdefault((url, username), []).append(row_id)
+    inserts, updates, skipped = {}, {}, 0
+
+    for url, username, password in items:
+        entry = (url, username)
+        if entry in existing:
+            if force:
+                updates[entry] = password
+            else:
+                skipped += 1
+        elif entry in inserts:
+            if force:
+                inserts[entry] = password
+            else:
+                skipped += 1
+        else:
+            inserts[entry] = password
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO credentials (url, username, password) VALUES (?,?,?)",
+            [(url, username, password) for (url, username), password in inserts.items()],
+        )
+        conn.executemany(
+            "UPDATE credentials SET password = ? WHERE id = ?",
+            [
+                (password, row_id)
+                for entry, password in updates.items()
+                for row_id in existing[entry]
+            ],
+        )
+    return len(inserts), len(updates), skipped
+
+
+def cmd_add(vault, args):
+    url, username = args.url.strip(), args.username.strip()
+    if not url or not username:
+        raise VaultError("URL and username must not be empty.")
+
+    if sys.stdin.isatty():
+        password = getpass.getpass("Enter the password: ")
+        if not password:
+            raise VaultError("Empty password.")
+    else:
+        password = sys.stdin.readline().rstrip("\r\n")
+        if not password:
+            raise VaultError("No password read from stdin.")
+    item = (url, username, password)
+
+    added, updated, _ = _apply_batch(vault.conn, [item], args.force)
+    if added:
+        print(f"Credentials added for {item[1]} @ {item[0]}")
+    elif updated:
+        print(f"Credentials updated for {item[1]} @ {item[0]}")
+    else:
+        raise VaultError(f"Credentials already exist for {item[1]} @ {item[0]}. Use --force to overwrite.")
+    return True
+
+
+def cmd_get(vault, args):
+    query = "SELECT username, password FROM credentials WHERE url = ?"
+    params = [args.url]
+    if args.username:
+        query += " AND username = ?"
+        params.append(args.username)
+    rows = vault.conn.execute(query, params).fetchall()
+
+    if not rows:
+        raise VaultError(f"No credentials stored for {args.url}.")
+    for username, password in rows:
+        print(f"{username}\t{password}")
+    return False
+
+
+def cmd_list(vault, args):
+    rows = vault.conn.execute(
+        "SELECT url, username, password FROM credentials ORDER BY url, username"
+    ).fetchall()
+    for url, username, password in rows:
+        if args.show_passwords:
+            print(f"{url}\t{username}\t{password}")
+        else:
+            print(f"{url}\t{username}")
+    return False
+
+
+def cmd_import(vault, args):
+    fmt = _guess_format(args.file, args.format)
+    if fmt == "text":
+        raise VaultError("Text exports cannot be imported; use json or csv.")
+    try:
+        if args.file in (None, "-"):
+            # Spreadsheet exports often start with a UTF-8 BOM.
+            text = sys.stdin.read().removeprefix("\ufeff")
+        else:
+            with open(args.file, encoding="utf-8-sig", newline="") as f:
+                text = f.read()
+    except UnicodeDecodeError as e:
+        raise VaultError(f"Batch is not valid UTF-8: {e}")
+
+    items = _parse_batch(text, fmt)
+    added, updated, skipped = _apply_batch(vault.conn, items, args.force)
+    print(f"import: {added} added, {updated} updated, {skipped} skipped", file=sys.stderr)
+    return bool(added or updated)
+
+
+def cmd_export(vault, args):
+    fmt = _guess_format(args.file, args.format)
+    rows = vault.conn.execute(
+        "SELECT url, username, password FROM credentials ORDER BY id"
+    ).fetchall()
+
+    out = io.StringIO()
+    if fmt == "json":
+        json.dump(
+            [{"url": u, "username": n, "password": p} for u, n, p in rows],
+            out,
+            indent=2,
+        )
+        out.write("\n")
+    elif fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["url", "username", "password"])
+        writer.writerows(rows)
+    else:
+        lines = ["=== Saved Passwords ===", ""]
+        for i, (url, user, pw) in enumerate(rows, 1):
+            lines += [
+                f"Entry #{i}",
+                f"Website: {url}",
+                f"Username: {user}",
+                f"Password: {pw}",
+                "",
+            ]
+        lines.append(f"=== Total: {len(rows)} passwords ===")
+        out.write("\n".join(lines) + "\n")
+
+    if args.file in (None, "-"):
+        sys.stdout.write(out.getvalue())
+    else:
+        # Plaintext passwords: owner-only, even if the file already existed.
+        fd = os.open(args.file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(out.getvalue())
+        print(f"export: {len(rows)} credentials written to {args.file}", file=sys.stderr)
+    return False
+
+
+def cmd_verify(vault, args):
+    (result,) = vault.conn.execute("PRAGMA integrity_check").fetchone()
+    if result != "ok":
+        raise VaultError(f"Integrity check failed: {result}")
+    (count,) = vault.conn.execute("SELECT COUNT(*) FROM credentials").fetchone()
+    print(f"ok: {count} credentials")
+    return False
+
+
+COMMANDS = {
+    "add": cmd_add,
+    "get": cmd_get,
+    "list": cmd_list,
+    "import": cmd_import,
+    "export": cmd_export,
+    "verify": cmd_verify,
+}
+
+
+# ---------- entry point ----------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="vault_cli.py",
+        description="Batch access to the AES-encrypted passwords.db on a USB drive.",
+    )
+    parser.add_argument("--db", help="path to passwords.db (default: auto-detect USB drive)")
+    parser.add_argument("--passphrase-file", metavar="FILE",
+                        help=f"read the passphrase from FILE ('-' = first line of stdin); "
+                             f"default: ${PASSPHRASE_ENV} or prompt")
+    parser.add_argument("--hex-key", action="store_true",
+                        help="treat the secret as a raw 64-hex-character AES key")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report timings")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="add one credential (password read from stdin)")
+    p.add_argument("url")
+    p.add_argument("username")
+    p.add_argument("--force", action="store_true", help="overwrite an existing entry")
+
+    p = sub.add_parser("get", help="print username<TAB>password for a site")
+    p.add_argument("url")
+    p.add_argument("-u", "--username")
+
+    p = sub.add_parser("list", help="list stored sites and usernames")
+    p.add_argument("--show-passwords", action="store_true")
+
+    p = sub.add_parser("import", help="apply a JSON/CSV batch in one transaction")
+    p.add_argument("file", nargs="?", help="batch file ('-' or omitted = stdin)")
+    p.add_argument("--format", choices=["json", "csv"])
+    p.add_argument("--force", action="store_true", help="overwrite existing entries")
+
+    p = sub.add_parser("export", help="dump all credentials UNENCRYPTED (plaintext passwords)")
+    p.add_argument("file", nargs="?",
+                   help="output file, created with 0600 permissions (omitted = stdout); "
+                        "the output is NOT encrypted")
+    p.add_argument("--format", choices=["json", "csv", "text"])
+
+    p = sub.add_parser("rekey", help="re-encrypt the database under a new passphrase")
+    p.add_argument("--new-passphrase-file", metavar="FILE",
+                   help=f"read the new passphrase from FILE; default: ${NEW_PASSPHRASE_ENV} or prompt")
+    p.add_argument("--new-hex-key", action="store_true",
+                   help="treat the new secret as a raw 64-hex-character AES key "
+                        "(independent of the global --hex-key)")
+
+    sub.add_parser("verify", help="check the passphrase and database integrity")
+    return parser
+
+
+def _read_new_secret(args):
+    """Read the rekey target from --new-passphrase-file, the env var, or two prompts."""
+    if args.new_passphrase_file or os.environ.get(NEW_PASSPHRASE_ENV):
+        return _read_secret(args.new_passphrase_file, NEW_PASSPHRASE_ENV, "")
+
+    new_secret = _read_secret(None, NEW_PASSPHRASE_ENV, "Enter the new passphrase: ")
+    if new_secret != getpass.getpass("Repeat the new passphrase: "):
+        raise VaultError("Passphrases do not match.")
+    return new_secret
+
+
+def run(args):
+    timings = Timings()
+
+    db_path = args.db
+    if not db_path:
+        usb_path = find_usb_drive()
+        if not usb_path:
+            raise VaultError("No USB drive found")
+        db_path = os.path.join(usb_path, "passwords.db")
+
+    secret = _read_secret(args.passphrase_file, PASSPHRASE_ENV,
+                          "Enter the master passphrase: ")
+
+    with timings.phase("unlock"):
+        key = _secret_to_key(secret, args.hex_key)
+        vault = Vault.unlock(db_path, key)
+
+    try:
+        new_key = None
+        if args.command == "rekey":
+            # Only ask for the new secret once the current one has been proven.
+            new_secret = _read_new_secret(args)
+
+        with timings.phase(args.command):
+            if args.command == "rekey":
+                new_key = _secret_to_key(new_secret, args.new_hex_key)
+                changed = True
+            else:
+                changed = COMMANDS[args.command](vault, args)
+
+        if changed:
+            with timings.phase("seal"):
+                vault.seal(new_key)
+            if args.command == "rekey":
+                print("Database re-encrypted under the new passphrase.", file=sys.stderr)
+    finally:
+        vault.close()
+        if not args.quiet:
+            timings.report()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        run(args)
+    except (VaultError, OSError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())